@@ -1,232 +1,62 @@
-import csv
-import io
-import json
-from pathlib import Path
-from typing import Any, Dict, List, Tuple
-
-import pandas as pd
-from flask import Flask, jsonify, render_template, request, send_file
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List
+
+import orjson
+from flask import Flask, Response, jsonify, render_template, request
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
 from openai import OpenAI
 
-app = Flask(__name__)
-
-TEMPLATE_HEADERS = ["block_name", "functionality_description"]
-CONFIG_PATH = Path("app_settings.json")
-BLOCKS_CACHE_PATH = Path("app_blocks_catalog.csv")
-REASONING_MODEL = "o4-mini"
-FALLBACK_CHAT_MODEL = "gpt-4o-mini"
-
-
-def load_persisted_settings() -> Dict[str, str]:
-    if not CONFIG_PATH.exists():
-        return {"api_key": "", "technical_checks": ""}
-    try:
-        data = json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
-        return {
-            "api_key": data.get("api_key", ""),
-            "technical_checks": data.get("technical_checks", ""),
-        }
-    except Exception:
-        return {"api_key": "", "technical_checks": ""}
-
-
-def save_persisted_settings(api_key: str, technical_checks: str) -> None:
-    CONFIG_PATH.write_text(
-        json.dumps({"api_key": api_key, "technical_checks": technical_checks}, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
-
-
-def load_cached_blocks() -> List[dict]:
-    if not BLOCKS_CACHE_PATH.exists():
-        return []
-    try:
-        df = pd.read_csv(BLOCKS_CACHE_PATH)
-    except Exception:
-        return []
-
-    if any(col not in df.columns for col in TEMPLATE_HEADERS):
-        return []
-
-    return df[TEMPLATE_HEADERS].fillna("").to_dict(orient="records")
+from core import (
+    OutputTruncatedError,
+    clear_persisted_settings,
+    get_client,
+    load_cached_blocks,
+    load_cached_blocks_text,
+    load_persisted_settings,
+    make_template_csv_bytes,
+    run_block_proposal_step,
+    run_clarification_step,
+    run_functional_design_step,
+    save_persisted_settings,
+    save_uploaded_blocks,
+)
 
 
-def save_uploaded_blocks(file_storage) -> Tuple[bool, str, List[dict]]:
-    raw = file_storage.read()
-    BLOCKS_CACHE_PATH.write_bytes(raw)
-    try:
-        df = pd.read_csv(io.BytesIO(raw))
-    except Exception as exc:
-        return False, f"Unable to read CSV file: {exc}", []
-
-    missing_cols = [col for col in TEMPLATE_HEADERS if col not in df.columns]
-    if missing_cols:
-        return False, "CSV file is missing required columns: " + ", ".join(missing_cols), []
-
-    return True, "", df[TEMPLATE_HEADERS].fillna("").to_dict(orient="records")
-
-
-def make_template_csv_bytes() -> bytes:
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(TEMPLATE_HEADERS)
-    return output.getvalue().encode("utf-8")
-
+# jsonify() and request.get_json() both go through app.json, so this swaps the whole app to orjson.
+class OrjsonProvider(JSONProvider):
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
 
-def get_client(api_key: str) -> OpenAI:
-    return OpenAI(api_key=api_key)
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
 
 
-def generate_text(client: OpenAI, prompt: str, temperature: float = 0.2) -> str:
-    if hasattr(client, "responses"):
-        response = client.responses.create(
-            model=REASONING_MODEL,
-            input=prompt,
-            reasoning={"effort": "medium"},
-            temperature=temperature,
-        )
-        return response.output_text.strip()
+MAX_UPLOAD_BYTES = 64 * 1024 * 1024
 
-    completion = client.chat.completions.create(
-        model=FALLBACK_CHAT_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=temperature,
-    )
-    return (completion.choices[0].message.content or "").strip()
-
-
-def run_clarification_step(
-    client: OpenAI,
-    technical_checks: str,
-    base_request: str,
-    requirement_messages: List[str],
-) -> Tuple[bool, str]:
-    req_history = "\n".join(requirement_messages) if requirement_messages else "(none)"
-    prompt = f"""
-You are a requirements-clarification assistant.
-Language for output: English.
-
-Technical checks provided by admin:
----
-{technical_checks or '(none provided)'}
----
-
-User requirement and clarifications so far:
----
-{req_history}
----
-
-Main requirement (first user request):
----
-{base_request}
----
-
-Task:
-1) Evaluate the requirement against the technical checks.
-2) If checks are missing, explicitly list which checks are not passed and ask targeted follow-up questions.
-3) If checks are complete, confirm all checks are covered and say we'll move to functional design.
-
-Return ONLY valid JSON:
-{{
-  "complete": true or false,
-  "assistant_message": "..."
-}}
-""".strip()
-
-    text = generate_text(client=client, prompt=prompt, temperature=0.2)
-    try:
-        parsed = json.loads(text)
-        return bool(parsed.get("complete", False)), str(parsed.get("assistant_message", "")).strip()
-    except json.JSONDecodeError:
-        return False, (
-            "Some technical checks are still unclear. "
-            "Please provide missing details about architecture, integrations, security, data constraints, and non-functional requirements."
-        )
-
-
-def run_functional_design_step(
-    client: OpenAI,
-    base_request: str,
-    requirement_messages: List[str],
-) -> str:
-    details = "\n".join(requirement_messages)
-    prompt = f"""
-You are a functional solution architect.
-Language for output: English.
-
-Base requirement:
----
-{base_request}
----
-
-Requirement details:
----
-{details}
----
-
-Produce a functional system design with:
-1) Ordered functional capabilities
-2) Logical execution flow
-3) Main data/integration touchpoints
-4) Assumptions
-
-End with: "If this design looks good, reply CONFIRMED. Otherwise, provide requested changes."
-""".strip()
-    return generate_text(client=client, prompt=prompt, temperature=0.25)
-
-
-def run_block_proposal_step(
-    client: OpenAI,
-    base_request: str,
-    requirement_messages: List[str],
-    design_feedback: str,
-    blocks: List[dict],
-) -> str:
-    blocks_text = "\n".join(
-        f"- {row.get('block_name', '').strip()}: {row.get('functionality_description', '').strip()}"
-        for row in blocks
-        if row.get("block_name", "").strip()
-    )
-    if not blocks_text:
-        blocks_text = "(No blocks available in CSV.)"
-
-    req_text = "\n".join(requirement_messages)
-
-    prompt = f"""
-You are a solution design assistant.
-Language for output: English.
-
-Base requirement:
----
-{base_request}
----
-
-Refined requirement context:
----
-{req_text}
----
-
-User feedback on functional design (or CONFIRMED):
----
-{design_feedback}
----
+app = Flask(__name__)
+app.json = OrjsonProvider(app)
+# Flask answers 413 before reading the body of any larger request.
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+app.config["COMPRESS_MIMETYPES"] = ["application/json", "text/html", "text/csv"]
+app.config["COMPRESS_MIN_SIZE"] = 500
+# Streamed chat replies must reach the browser chunk by chunk.
+app.config["COMPRESS_STREAMS"] = False
+Compress(app)
 
-Available blocks from CSV:
----
-{blocks_text}
----
+# Opening messages that carry no requirement; they get a canned reply instead of an LLM call.
+TRIVIAL_ACKNOWLEDGEMENTS = frozenset({"ok", "okay", "thanks", "thank you", "done", "hi", "hello"})
+NO_REQUEST_REPLY = "Please describe the system you want to build, and I will check it against the technical checks."
+TRUNCATED_REPLY = "The answer was truncated before it was complete (output limit reached). Please send your message again to retry."
 
-Create a proposal with these sections:
-1) Final interpreted requirement
-2) Recommended blocks from catalog (only relevant ones)
-3) Suggested implementation sequence
-4) Missing capabilities not covered by listed blocks
-5) Optional extra blocks/capabilities to add
+# Runs the functional design speculatively while the clarification check is in flight.
+_speculation_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="speculative-design")
 
-If user requested design changes, incorporate them before selecting blocks.
-""".strip()
 
-    return generate_text(client=client, prompt=prompt, temperature=0.3)
+@app.errorhandler(413)
+def request_too_large(_exc):
+    return jsonify({"ok": False, "error": "File too large"}), 413
 
 
 @app.get("/")
@@ -255,8 +85,7 @@ def save_settings_api():
 
 @app.post("/api/settings/clear")
 def clear_settings_api():
-    if CONFIG_PATH.exists():
-        CONFIG_PATH.unlink()
+    clear_persisted_settings()
     return jsonify({"ok": True})
 
 
@@ -265,6 +94,8 @@ def upload_blocks_api():
     file = request.files.get("file")
     if file is None:
         return jsonify({"ok": False, "error": "No file uploaded"}), 400
+    if file.content_length and file.content_length > MAX_UPLOAD_BYTES:
+        return jsonify({"ok": False, "error": "File too large"}), 413
     ok, error, rows = save_uploaded_blocks(file)
     if not ok:
         return jsonify({"ok": False, "error": error}), 400
@@ -273,12 +104,10 @@ def upload_blocks_api():
 
 @app.get("/api/blocks/template")
 def download_template_api():
-    data = make_template_csv_bytes()
-    return send_file(
-        io.BytesIO(data),
+    return Response(
+        make_template_csv_bytes(),
         mimetype="text/csv",
-        as_attachment=True,
-        download_name="blocks_template.csv",
+        headers={"Content-Disposition": 'attachment; filename="blocks_template.csv"'},
     )
 
 
@@ -294,74 +123,158 @@ def chat_api():
     state = payload.get("state", {}) or {}
     phase = state.get("phase", "clarification")
     base_request = state.get("base_request", "")
-    requirement_messages = state.get("requirement_messages", [])
+    requirement_text = state.get("requirement_text", "")
 
     if not user_input:
         return jsonify({"ok": False, "error": "Empty input."}), 400
 
+    if not base_request and user_input.lower().rstrip(".!") in TRIVIAL_ACKNOWLEDGEMENTS:
+        # Nothing to design yet: answer without a model call and keep the workflow where it is.
+        events = iter([{"ok": True, "assistant_messages": [NO_REQUEST_REPLY], "state": state}])
+        return _turn_response(events, stream=bool(payload.get("stream")))
+
     if not base_request:
         base_request = user_input
 
-    if not isinstance(requirement_messages, list):
-        requirement_messages = []
+    if not isinstance(requirement_text, str):
+        requirement_text = ""
+    if not requirement_text and isinstance(state.get("requirement_messages"), list):
+        # State saved by an older page load still carries the list form.
+        requirement_text = "\n".join(str(m) for m in state["requirement_messages"])
+    prior_requirement_text = requirement_text
+    # Repeated messages add no information, only input tokens on every later turn.
+    if user_input not in requirement_text.split("\n"):
+        requirement_text = requirement_text + ("\n" if requirement_text else "") + user_input
+
+    # ?nocache=1 forces a fresh model call (the new answer still replaces the cached one).
+    use_cache = request.args.get("nocache") != "1"
+    events = _chat_turn_events(
+        client=get_client(api_key),
+        technical_checks=settings.get("technical_checks", ""),
+        phase=phase,
+        base_request=base_request,
+        requirement_text=requirement_text,
+        prior_requirement_text=prior_requirement_text,
+        user_input=user_input,
+        use_cache=use_cache,
+    )
+    return _turn_response(events, stream=bool(payload.get("stream")))
+
+
+def _turn_response(events: Iterator[Dict[str, Any]], stream: bool):
+    if stream:
+        # One JSON object per line: {"delta": ...} chunks, then the final turn result.
+        return Response((app.json.dumps(event) + "\n" for event in events), mimetype="application/x-ndjson")
+
+    *_, result = events
+    if not result.get("ok"):
+        return jsonify(result), 500
+    return jsonify(result)
 
-    client = get_client(api_key)
-    technical_checks = settings.get("technical_checks", "")
-    blocks = load_cached_blocks()
 
+def _chat_turn_events(
+    client: OpenAI,
+    technical_checks: str,
+    phase: str,
+    base_request: str,
+    requirement_text: str,
+    prior_requirement_text: str,
+    user_input: str,
+    use_cache: bool,
+) -> Iterator[Dict[str, Any]]:
+    sent_phase = phase
     try:
         assistant_messages: List[str] = []
         if phase == "clarification":
             # Technical completeness check is asked only once (first interaction).
-            requirement_messages.append(user_input)
-            _complete, answer = run_clarification_step(
+            # The design is started speculatively alongside it and kept only if all checks pass.
+            design_future = _speculation_pool.submit(
+                lambda: "".join(
+                    run_functional_design_step(
+                        client=client,
+                        base_request=base_request,
+                        req_history=requirement_text,
+                        use_cache=use_cache,
+                    )
+                ).strip()
+            )
+            complete, answer = run_clarification_step(
                 client=client,
                 technical_checks=technical_checks,
                 base_request=base_request,
-                requirement_messages=requirement_messages,
+                req_history=requirement_text,
+                use_cache=use_cache,
             )
             assistant_messages.append(answer)
-            assistant_messages.append(
-                "Please share any additional details now (optional). Then I will produce the functional design in the next response."
-            )
-            phase = "functional_design"
+            if complete:
+                # All checks passed: reuse the speculative design and skip the extra turn.
+                assistant_messages.append(design_future.result())
+                phase = "block_proposal"
+            else:
+                # Best effort: a design already in flight still finishes, its answer is just unused.
+                design_future.cancel()
+                assistant_messages.append(
+                    "Please share any additional details now (optional). Then I will produce the functional design in the next response."
+                )
+                phase = "functional_design"
 
         elif phase == "functional_design":
             # User can provide missing details (or skip); we then always proceed.
-            requirement_messages.append(user_input)
-            design = run_functional_design_step(
+            parts: List[str] = []
+            for delta in run_functional_design_step(
                 client=client,
                 base_request=base_request,
-                requirement_messages=requirement_messages,
-            )
-            assistant_messages.append(design)
+                req_history=requirement_text,
+                use_cache=use_cache,
+            ):
+                parts.append(delta)
+                yield {"delta": delta}
+            assistant_messages.append("".join(parts).strip())
             phase = "block_proposal"
 
         else:
-            requirement_messages.append(user_input)
-            proposal = run_block_proposal_step(
+            parts = []
+            # The latest message goes in as design_feedback, so leave it out of the history section.
+            for delta in run_block_proposal_step(
                 client=client,
                 base_request=base_request,
-                requirement_messages=requirement_messages,
+                req_history=prior_requirement_text,
                 design_feedback=user_input,
-                blocks=blocks,
-            )
-            assistant_messages.append(proposal)
-
-        return jsonify(
-            {
-                "ok": True,
-                "assistant_messages": assistant_messages,
-                "state": {
-                    "phase": phase,
-                    "base_request": base_request,
-                    "requirement_messages": requirement_messages,
-                },
-            }
-        )
+                blocks_text=load_cached_blocks_text(query=requirement_text),
+                use_cache=use_cache,
+            ):
+                parts.append(delta)
+                yield {"delta": delta}
+            assistant_messages.append("".join(parts).strip())
+
+        yield {
+            "ok": True,
+            "assistant_messages": assistant_messages,
+            "state": {
+                "phase": phase,
+                "base_request": base_request,
+                "requirement_text": requirement_text,
+            },
+        }
+    except OutputTruncatedError:
+        # Drop the partial answer and leave the workflow where it was, so resending the message retries the turn.
+        yield {
+            "ok": True,
+            "truncated": True,
+            "assistant_messages": [TRUNCATED_REPLY],
+            "state": {
+                "phase": sent_phase,
+                "base_request": base_request,
+                "requirement_text": prior_requirement_text,
+            },
+        }
     except Exception as exc:
-        return jsonify({"ok": False, "error": f"Error while contacting OpenAI API: {exc}"}), 500
+        yield {"ok": False, "error": f"Error while contacting OpenAI API: {exc}"}
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8000, debug=True)
+    # Development server only; production runs under gunicorn (see Procfile).
+    debug = os.environ.get("FLASK_DEBUG", "1") == "1"
+    if debug:
+        print("Running Flask development server with debug=True; use gunicorn for production.")
+    app.run(host="0.0.0.0", port=8000, debug=debug)
@@ -0,0 +1,133 @@
+import io
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from openai import OpenAI
+
+from core import (
+    block_proposal_options,
+    clarification_options,
+    functional_design_options,
+    get_client,
+    load_persisted_settings,
+    responses_request,
+)
+
+# Offline runs (prompt evaluation, bulk seed requests) through the Batch API: half the price of
+# real-time calls, results within the completion window instead of immediately.
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_SECONDS = 30.0
+_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+STEP_OPTIONS = {
+    "clarification": clarification_options,
+    "functional_design": functional_design_options,
+    "block_proposal": block_proposal_options,
+}
+
+
+def _batch_jsonl(requests: List[Dict[str, Any]]) -> bytes:
+    lines = [
+        orjson.dumps(
+            {
+                "custom_id": f"request-{i}",
+                "method": "POST",
+                "url": "/v1/responses",
+                "body": responses_request(**options),
+            }
+        )
+        for i, options in enumerate(requests)
+    ]
+    return b"\n".join(lines) + b"\n"
+
+
+def _output_text(body: Dict[str, Any]) -> str:
+    # Raw Responses payloads have no output_text shortcut; join the message text parts.
+    return "".join(
+        part.get("text", "")
+        for item in body.get("output", [])
+        if item.get("type") == "message"
+        for part in item.get("content", [])
+        if part.get("type") == "output_text"
+    ).strip()
+
+
+def _record_result(record: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    # (output, error) for one line of a batch output or error file; exactly one of them is set.
+    if record.get("error"):
+        error = record["error"]
+        return None, f"{error.get('code', 'error')}: {error.get('message', 'request failed')}"
+    response = record.get("response") or {}
+    body = response.get("body") or {}
+    if response.get("status_code") != 200:
+        message = (body.get("error") or {}).get("message", "request failed")
+        return None, f"HTTP {response.get('status_code')}: {message}"
+    if body.get("status") == "incomplete":
+        return None, "incomplete response: " + ((body.get("incomplete_details") or {}).get("reason") or "unknown")
+    return _output_text(body), None
+
+
+def run_batch(
+    client: OpenAI,
+    requests: List[Dict[str, Any]],
+    poll_seconds: float = BATCH_POLL_SECONDS,
+) -> Tuple[List[Optional[str]], Dict[int, str]]:
+    # Returns (outputs, errors): a failed request has output None and its message in errors[index],
+    # so "failed" is never confused with an empty answer.
+    upload = client.files.create(
+        file=("requests.jsonl", io.BytesIO(_batch_jsonl(requests))),
+        purpose="batch",
+    )
+    batch = client.batches.create(
+        input_file_id=upload.id,
+        endpoint="/v1/responses",
+        completion_window=BATCH_COMPLETION_WINDOW,
+    )
+    while batch.status not in _TERMINAL_STATUSES:
+        time.sleep(poll_seconds)
+        batch = client.batches.retrieve(batch.id)
+
+    if batch.status != "completed":
+        raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+
+    outputs: List[Optional[str]] = [None] * len(requests)
+    errors: Dict[int, str] = {}
+    # Successful requests land in the output file, failed ones in the error file; either may be absent.
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            index = int(record["custom_id"].rsplit("-", 1)[1])
+            outputs[index], error = _record_result(record)
+            if error is not None:
+                errors[index] = error
+    for index, output in enumerate(outputs):
+        if output is None and index not in errors:
+            errors[index] = "no result returned"
+    return outputs, errors
+
+
+if __name__ == "__main__":
+    # Usage: python batch.py seeds.json, where seeds.json is a list of
+    # {"step": "clarification" | "functional_design" | "block_proposal", ...step arguments}.
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python batch.py <requests.json>")
+    api_key = load_persisted_settings().get("api_key", "")
+    if not api_key:
+        sys.exit("Please save OpenAI API key in Settings.")
+
+    with open(sys.argv[1], "rb") as f:
+        seeds = orjson.loads(f.read())
+    batch_requests = [STEP_OPTIONS[seed.pop("step")](**seed) for seed in seeds]
+    outputs, errors = run_batch(get_client(api_key), batch_requests)
+    # Failed requests are null in the output list and reported on stderr.
+    sys.stdout.write(orjson.dumps(outputs, option=orjson.OPT_INDENT_2).decode("utf-8") + "\n")
+    for index, error in sorted(errors.items()):
+        sys.stderr.write(f"request-{index}: {error}\n")
+    if errors:
+        sys.exit(1)
@@ -0,0 +1,704 @@
+import csv
+import hashlib
+import importlib.util
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+import diskcache
+import httpx
+import orjson
+from jinja2 import BaseLoader, Environment
+from openai import OpenAI
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    _HAS_ARROW = True
+except ImportError:
+    _HAS_ARROW = False
+
+
+TEMPLATE_HEADERS = ["block_name", "functionality_description"]
+CONFIG_PATH = Path("app_settings.json")
+BLOCKS_CACHE_PATH = Path("app_blocks_catalog.csv")
+_TEMPLATE_CSV_BYTES = (",".join(TEMPLATE_HEADERS) + "\r\n").encode("utf-8")
+REASONING_MODEL = "o4-mini"
+FALLBACK_CHAT_MODEL = "gpt-4o-mini"
+# The clarification verdict is a short, schema-constrained answer; a small fast model is enough.
+CLARIFICATION_MODEL = "gpt-4.1-nano"
+# Output ceilings bound worst-case latency; reasoning tokens count against them on o4-mini.
+CLARIFICATION_MAX_OUTPUT_TOKENS = 512
+FUNCTIONAL_DESIGN_MAX_OUTPUT_TOKENS = 4000
+BLOCK_PROPOSAL_MAX_OUTPUT_TOKENS = 6000
+CLARIFICATION_FORMAT: Dict[str, Any] = {
+    "type": "json_schema",
+    "name": "clarification",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "complete": {"type": "boolean", "description": "True only if every technical check is covered."},
+            "assistant_message": {"type": "string", "description": "Message shown to the user."},
+        },
+        "required": ["complete", "assistant_message"],
+        "additionalProperties": False,
+    },
+}
+# Resolved once per process from the installed openai package. Probe the module, not the class:
+# older 1.x releases only assign client.responses in __init__, so hasattr(OpenAI, ...) misses them.
+_HAS_RESPONSES = importlib.util.find_spec("openai.resources.responses") is not None
+# Content-addressed store of model outputs: identical (model, temperature, prompt) skip the API.
+LLM_CACHE_DIR = ".llm_cache"
+LLM_CACHE_TTL_SECONDS = 3600
+_llm_cache = diskcache.Cache(LLM_CACHE_DIR, size_limit=200 * 1024 * 1024)
+# Drop the import-time SQLite handle so gunicorn --preload workers each open their own on first use.
+_llm_cache.close()
+
+# OpenAI clients by API key, least recently used first. Evicted clients are only dropped, never closed:
+# streamed replies, speculative designs and batch polls may still be using them, and the garbage
+# collector releases their pools once the last user is done.
+MAX_CACHED_CLIENTS = 8
+_clients_lock = threading.Lock()
+_clients: Dict[str, OpenAI] = {}
+
+# Parsed settings/catalog, keyed on (st_mtime_ns, st_size) of the backing file.
+_cache_lock = threading.Lock()
+_settings_cache: Dict[str, Any] = {"key": None, "val": None}
+_blocks_cache: Dict[str, Any] = {"key": None, "val": None, "text": None, "index": None, "digest": None}
+
+# Only the newest requirement messages go into prompts; the base request is always sent on its own.
+REQUIREMENT_CONTEXT_LINES = 12
+
+# Catalog listings longer than this are narrowed to the blocks most relevant to the requirement.
+BLOCKS_TEXT_MAX_CHARS = 30_000
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Optional pyarrow fast path: its multithreaded reader only pays off on larger catalogs.
+ARROW_MIN_BYTES = 1 << 20
+
+
+def _file_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _read_persisted_settings() -> Dict[str, str]:
+    try:
+        data = orjson.loads(CONFIG_PATH.read_bytes())
+        return {
+            "api_key": data.get("api_key", ""),
+            "technical_checks": data.get("technical_checks", ""),
+        }
+    except Exception:
+        return {"api_key": "", "technical_checks": ""}
+
+
+def load_persisted_settings() -> Dict[str, str]:
+    key = _file_key(CONFIG_PATH)
+    if key is None:
+        return {"api_key": "", "technical_checks": ""}
+    with _cache_lock:
+        if _settings_cache["key"] != key:
+            _settings_cache["val"] = _read_persisted_settings()
+            _settings_cache["key"] = key
+        return dict(_settings_cache["val"])
+
+
+def save_persisted_settings(api_key: str, technical_checks: str) -> None:
+    new = {"api_key": api_key, "technical_checks": technical_checks}
+    if _file_key(CONFIG_PATH) is not None and load_persisted_settings() == new:
+        return
+
+    # A per-call temp file, so concurrent saves never interleave writes into one staging file.
+    fd, tmp_name = tempfile.mkstemp(dir=CONFIG_PATH.parent, suffix=".json.tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(orjson.dumps(new, option=orjson.OPT_INDENT_2))
+        # Replace and re-key under one lock, so a concurrent save can never leave its values cached
+        # under the key of another save's file.
+        with _cache_lock:
+            os.replace(tmp_name, CONFIG_PATH)
+            _settings_cache["val"] = new
+            _settings_cache["key"] = _file_key(CONFIG_PATH)
+    finally:
+        Path(tmp_name).unlink(missing_ok=True)
+
+
+def clear_persisted_settings() -> None:
+    if CONFIG_PATH.exists():
+        CONFIG_PATH.unlink()
+    reset_clients()
+
+
+def _parse_blocks_csv(text_stream) -> Tuple[List[str], List[dict]]:
+    # Project the template columns by position; extra columns are never materialized.
+    reader = csv.reader(text_stream)
+    header = next(reader, [])
+    missing_cols = [col for col in TEMPLATE_HEADERS if col not in header]
+    if missing_cols:
+        return missing_cols, []
+    name_idx, desc_idx = (header.index(col) for col in TEMPLATE_HEADERS)
+    width = max(name_idx, desc_idx) + 1
+    rows = []
+    for record in reader:
+        if not record:
+            continue
+        if len(record) < width:
+            record = record + [""] * (width - len(record))
+        rows.append({"block_name": record[name_idx].strip(), "functionality_description": record[desc_idx].strip()})
+    return [], rows
+
+
+def _read_blocks_csv_arrow(path: Path) -> List[dict]:
+    table = pacsv.read_csv(
+        str(path),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=TEMPLATE_HEADERS,
+            column_types={col: pa.string() for col in TEMPLATE_HEADERS},
+            strings_can_be_null=False,
+        ),
+    )
+    names = table.column("block_name").to_pylist()
+    descs = table.column("functionality_description").to_pylist()
+    return [{"block_name": n.strip(), "functionality_description": d.strip()} for n, d in zip(names, descs)]
+
+
+def _parse_blocks_file(path: Path) -> Tuple[List[str], List[dict]]:
+    if _HAS_ARROW and path.stat().st_size > ARROW_MIN_BYTES:
+        try:
+            return [], _read_blocks_csv_arrow(path)
+        except Exception:
+            pass  # Fall back to the stdlib parser, which also reports missing columns.
+    with path.open(newline="", encoding="utf-8-sig") as f:
+        return _parse_blocks_csv(f)
+
+
+def _read_cached_blocks() -> List[dict]:
+    try:
+        _missing_cols, rows = _parse_blocks_file(BLOCKS_CACHE_PATH)
+    except Exception:
+        return []
+    return rows
+
+
+def _format_block_line(row: dict) -> str:
+    # Rows come from the parsers already stripped.
+    return f"- {row['block_name']}: {row['functionality_description']}"
+
+
+def _tokenize(text: str) -> FrozenSet[str]:
+    return frozenset(_WORD_RE.findall(text.lower()))
+
+
+def format_blocks_text(blocks: List[dict]) -> str:
+    blocks_text = "\n".join(_format_block_line(row) for row in blocks if row["block_name"])
+    return blocks_text or "(No blocks available in CSV.)"
+
+
+def _build_blocks_index(blocks: List[dict]) -> List[Tuple[str, FrozenSet[str]]]:
+    return [
+        (_format_block_line(row), _tokenize(f"{row['block_name']} {row['functionality_description']}"))
+        for row in blocks
+        if row["block_name"]
+    ]
+
+
+def _select_relevant_blocks_text(index: List[Tuple[str, FrozenSet[str]]], query: str) -> str:
+    query_tokens = _tokenize(query)
+    ranked = sorted(range(len(index)), key=lambda i: len(index[i][1] & query_tokens), reverse=True)
+    chosen: List[int] = []
+    budget = BLOCKS_TEXT_MAX_CHARS
+    for i in ranked:
+        budget -= len(index[i][0]) + 1
+        if budget < 0:
+            break
+        chosen.append(i)
+    chosen.sort()
+    note = f"(Showing the {len(chosen)} of {len(index)} catalog blocks most relevant to the requirement.)"
+    return "\n".join([index[i][0] for i in chosen] + [note])
+
+
+def _refresh_blocks_cache(key: Tuple[int, int]) -> None:
+    # Caller holds _cache_lock.
+    if _blocks_cache["key"] != key:
+        _blocks_cache["val"] = _read_cached_blocks()
+        _blocks_cache["text"] = None
+        _blocks_cache["index"] = None
+        _blocks_cache["digest"] = None
+        _blocks_cache["key"] = key
+
+
+def load_cached_blocks() -> List[dict]:
+    key = _file_key(BLOCKS_CACHE_PATH)
+    if key is None:
+        return []
+    with _cache_lock:
+        _refresh_blocks_cache(key)
+        return _blocks_cache["val"]
+
+
+def load_cached_blocks_text(query: str = "") -> str:
+    key = _file_key(BLOCKS_CACHE_PATH)
+    if key is None:
+        return format_blocks_text([])
+    with _cache_lock:
+        _refresh_blocks_cache(key)
+        if _blocks_cache["text"] is None:
+            _blocks_cache["text"] = format_blocks_text(_blocks_cache["val"])
+        blocks_text = _blocks_cache["text"]
+        if len(blocks_text) <= BLOCKS_TEXT_MAX_CHARS:
+            return blocks_text
+        if _blocks_cache["index"] is None:
+            _blocks_cache["index"] = _build_blocks_index(_blocks_cache["val"])
+        index = _blocks_cache["index"]
+    return _select_relevant_blocks_text(index, query)
+
+
+def save_uploaded_blocks(file_storage) -> Tuple[bool, str, List[dict]]:
+    # Validate a staged copy so a bad upload never replaces the working catalog.
+    # Each request stages into its own file, so concurrent uploads never write or remove each other's.
+    fd, tmp_name = tempfile.mkstemp(dir=BLOCKS_CACHE_PATH.parent, suffix=".csv.tmp")
+    tmp = Path(tmp_name)
+    try:
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as out:
+            while chunk := file_storage.stream.read(1 << 20):
+                digest.update(chunk)
+                out.write(chunk)
+
+        # Re-uploading the catalog that is already live needs no parse or replace.
+        with _cache_lock:
+            unchanged = (
+                _blocks_cache["digest"] == digest.digest()
+                and _blocks_cache["key"] is not None
+                and _blocks_cache["key"] == _file_key(BLOCKS_CACHE_PATH)
+            )
+            if unchanged:
+                return True, "", _blocks_cache["val"]
+
+        try:
+            missing_cols, rows = _parse_blocks_file(tmp)
+        except Exception as exc:
+            return False, f"Unable to read CSV file: {exc}", []
+
+        if missing_cols:
+            return False, "CSV file is missing required columns: " + ", ".join(missing_cols), []
+
+        with _cache_lock:
+            os.replace(tmp, BLOCKS_CACHE_PATH)
+            key = _file_key(BLOCKS_CACHE_PATH)
+            blocks_text = format_blocks_text(rows)
+            _blocks_cache["val"] = rows
+            _blocks_cache["text"] = blocks_text
+            # Oversized catalogs are ranked on every proposal turn, so tokenize them now rather than then.
+            _blocks_cache["index"] = _build_blocks_index(rows) if len(blocks_text) > BLOCKS_TEXT_MAX_CHARS else None
+            _blocks_cache["digest"] = digest.digest()
+            _blocks_cache["key"] = key
+        return True, "", rows
+    finally:
+        # Already gone once os.replace has installed it.
+        tmp.unlink(missing_ok=True)
+
+
+def make_template_csv_bytes() -> bytes:
+    return _TEMPLATE_CSV_BYTES
+
+
+def get_client(api_key: str) -> OpenAI:
+    # One client per key keeps its httpx pool (and TLS sessions) alive across chat turns.
+    with _clients_lock:
+        client = _clients.pop(api_key, None)
+        if client is None:
+            client = OpenAI(
+                api_key=api_key,
+                http_client=httpx.Client(
+                    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+                    timeout=60.0,
+                ),
+            )
+            if len(_clients) >= MAX_CACHED_CLIENTS:
+                del _clients[next(iter(_clients))]
+        _clients[api_key] = client  # Re-insert so dict order tracks recency.
+        return client
+
+
+def reset_clients() -> None:
+    with _clients_lock:
+        _clients.clear()
+
+
+def _prompt_messages(prompt: str, instructions: Optional[str]) -> List[Dict[str, str]]:
+    # Static instructions go first so OpenAI's prompt-prefix caching can reuse them across turns.
+    messages = [{"role": "system", "content": instructions}] if instructions else []
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def responses_request(
+    prompt: str,
+    temperature: float,
+    instructions: Optional[str] = None,
+    model: Optional[str] = None,
+    text_format: Optional[Dict[str, Any]] = None,
+    max_output_tokens: Optional[int] = None,
+) -> Dict[str, Any]:
+    body: Dict[str, Any] = {
+        "model": model or REASONING_MODEL,
+        "input": _prompt_messages(prompt, instructions),
+        "temperature": temperature,
+    }
+    if model is None:
+        body["reasoning"] = {"effort": "medium"}
+    if text_format is not None:
+        body["text"] = {"format": text_format}
+    if max_output_tokens is not None:
+        body["max_output_tokens"] = max_output_tokens
+    return body
+
+
+def _chat_request(
+    prompt: str,
+    temperature: float,
+    instructions: Optional[str] = None,
+    model: Optional[str] = None,
+    text_format: Optional[Dict[str, Any]] = None,
+    max_output_tokens: Optional[int] = None,
+) -> Dict[str, Any]:
+    body: Dict[str, Any] = {
+        "model": model or FALLBACK_CHAT_MODEL,
+        "messages": _prompt_messages(prompt, instructions),
+        "temperature": temperature,
+    }
+    if text_format is not None:
+        body["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {key: value for key, value in text_format.items() if key != "type"},
+        }
+    if max_output_tokens is not None:
+        body["max_tokens"] = max_output_tokens
+    return body
+
+
+class OutputTruncatedError(RuntimeError):
+    # Raised instead of returning a cut-off answer, so partial text is never shown as complete or cached.
+    pass
+
+
+def _incomplete_reason(response: Any) -> str:
+    details = getattr(response, "incomplete_details", None)
+    return getattr(details, "reason", None) or "unknown"
+
+
+def _call_model(client: OpenAI, options: Dict[str, Any]) -> str:
+    if _HAS_RESPONSES:
+        response = client.responses.create(**responses_request(**options))
+        if response.status == "incomplete":
+            raise OutputTruncatedError(_incomplete_reason(response))
+        return response.output_text.strip()
+
+    completion = client.chat.completions.create(**_chat_request(**options))
+    choice = completion.choices[0]
+    if choice.finish_reason == "length":
+        raise OutputTruncatedError("max_tokens")
+    return (choice.message.content or "").strip()
+
+
+def _stream_model(client: OpenAI, options: Dict[str, Any]) -> Iterator[str]:
+    if _HAS_RESPONSES:
+        with client.responses.stream(**responses_request(**options)) as stream:
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    yield event.delta
+                elif event.type == "response.incomplete":
+                    raise OutputTruncatedError(_incomplete_reason(event.response))
+        return
+
+    for chunk in client.chat.completions.create(stream=True, **_chat_request(**options)):
+        if not chunk.choices:
+            continue
+        if chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+        if chunk.choices[0].finish_reason == "length":
+            raise OutputTruncatedError("max_tokens")
+
+
+def _llm_cache_key(options: Dict[str, Any]) -> bytes:
+    # Hash the exact request body, so any option that can change the answer is part of the key.
+    body = responses_request(**options) if _HAS_RESPONSES else _chat_request(**options)
+    return hashlib.sha256(orjson.dumps(body, option=orjson.OPT_SORT_KEYS)).digest()
+
+
+def generate_text(
+    client: OpenAI,
+    prompt: str,
+    temperature: float = 0.2,
+    use_cache: bool = True,
+    instructions: Optional[str] = None,
+    model: Optional[str] = None,
+    text_format: Optional[Dict[str, Any]] = None,
+    max_output_tokens: Optional[int] = None,
+) -> str:
+    options = {
+        "prompt": prompt,
+        "temperature": temperature,
+        "instructions": instructions,
+        "model": model,
+        "text_format": text_format,
+        "max_output_tokens": max_output_tokens,
+    }
+    key = _llm_cache_key(options)
+    if use_cache:
+        cached = _llm_cache.get(key)
+        if cached is not None:
+            return cached
+
+    text = _call_model(client, options)
+    if text:
+        _llm_cache.set(key, text, expire=LLM_CACHE_TTL_SECONDS)
+    return text
+
+
+def stream_text(
+    client: OpenAI,
+    prompt: str,
+    temperature: float = 0.2,
+    use_cache: bool = True,
+    instructions: Optional[str] = None,
+    max_output_tokens: Optional[int] = None,
+) -> Iterator[str]:
+    # Same cache as generate_text; a hit is replayed as a single chunk.
+    options = {
+        "prompt": prompt,
+        "temperature": temperature,
+        "instructions": instructions,
+        "max_output_tokens": max_output_tokens,
+    }
+    key = _llm_cache_key(options)
+    if use_cache:
+        cached = _llm_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts: List[str] = []
+    for delta in _stream_model(client, options):
+        parts.append(delta)
+        yield delta
+    text = "".join(parts).strip()
+    if text:
+        _llm_cache.set(key, text, expire=LLM_CACHE_TTL_SECONDS)
+
+
+# Each step's prompt is split in two: constant instructions (sent first, identical on every call)
+# and a Jinja template for the per-turn context, ordered from most to least stable.
+_PROMPT_ENV = Environment(loader=BaseLoader(), trim_blocks=True, lstrip_blocks=True)
+
+CLARIFICATION_INSTRUCTIONS = """\
+You are a requirements-clarification assistant.
+Language for output: English.
+
+You receive the technical checks provided by admin, the main requirement (first user request),
+and the user requirement and clarifications so far.
+
+Task:
+1) Evaluate the requirement against the technical checks.
+2) If checks are missing, explicitly list which checks are not passed and ask targeted follow-up questions.
+3) If checks are complete, confirm all checks are covered and say we'll move to functional design.
+"""
+
+_CLARIFICATION_INPUT = _PROMPT_ENV.from_string("""\
+Technical checks provided by admin:
+---
+{{ technical_checks or '(none provided)' }}
+---
+
+Main requirement (first user request):
+---
+{{ base_request }}
+---
+
+User requirement and clarifications so far:
+---
+{{ req_history }}
+---
+""")
+
+FUNCTIONAL_DESIGN_INSTRUCTIONS = """\
+You are a functional solution architect.
+Language for output: English.
+
+You receive the base requirement and the requirement details.
+
+Produce a functional system design with:
+1) Ordered functional capabilities
+2) Logical execution flow
+3) Main data/integration touchpoints
+4) Assumptions
+
+Keep the design under 500 words.
+End with: "If this design looks good, reply CONFIRMED. Otherwise, provide requested changes."
+"""
+
+_FUNCTIONAL_DESIGN_INPUT = _PROMPT_ENV.from_string("""\
+Base requirement:
+---
+{{ base_request }}
+---
+
+Requirement details:
+---
+{{ details }}
+---
+""")
+
+BLOCK_PROPOSAL_INSTRUCTIONS = """\
+You are a solution design assistant.
+Language for output: English.
+
+You receive the available blocks from CSV, the base requirement, the refined requirement context,
+and the user feedback on the functional design (or CONFIRMED).
+
+Create a proposal with these sections:
+1) Final interpreted requirement
+2) Recommended blocks from catalog (only relevant ones)
+3) Suggested implementation sequence
+4) Missing capabilities not covered by listed blocks
+5) Optional extra blocks/capabilities to add
+
+Keep the proposal under 700 words.
+If user requested design changes, incorporate them before selecting blocks.
+"""
+
+_BLOCK_PROPOSAL_INPUT = _PROMPT_ENV.from_string("""\
+Available blocks from CSV:
+---
+{{ blocks_text }}
+---
+
+Base requirement:
+---
+{{ base_request }}
+---
+
+Refined requirement context:
+---
+{{ req_text }}
+---
+
+User feedback on functional design (or CONFIRMED):
+---
+{{ design_feedback }}
+---
+""")
+
+
+def _recent_requirements(req_history: str) -> str:
+    lines = req_history.split("\n")
+    if len(lines) <= REQUIREMENT_CONTEXT_LINES:
+        return req_history
+    omitted = len(lines) - REQUIREMENT_CONTEXT_LINES
+    return "\n".join([f"({omitted} earlier messages omitted)"] + lines[-REQUIREMENT_CONTEXT_LINES:])
+
+
+def clarification_options(technical_checks: str, base_request: str, req_history: str) -> Dict[str, Any]:
+    return {
+        "prompt": _CLARIFICATION_INPUT.render(
+            technical_checks=technical_checks,
+            req_history=_recent_requirements(req_history) or "(none)",
+            base_request=base_request,
+        ),
+        "temperature": 0.2,
+        "instructions": CLARIFICATION_INSTRUCTIONS,
+        "model": CLARIFICATION_MODEL,
+        "text_format": CLARIFICATION_FORMAT,
+        "max_output_tokens": CLARIFICATION_MAX_OUTPUT_TOKENS,
+    }
+
+
+def functional_design_options(base_request: str, req_history: str) -> Dict[str, Any]:
+    return {
+        "prompt": _FUNCTIONAL_DESIGN_INPUT.render(
+            base_request=base_request,
+            details=_recent_requirements(req_history),
+        ),
+        "temperature": 0.25,
+        "instructions": FUNCTIONAL_DESIGN_INSTRUCTIONS,
+        "max_output_tokens": FUNCTIONAL_DESIGN_MAX_OUTPUT_TOKENS,
+    }
+
+
+def block_proposal_options(
+    base_request: str,
+    req_history: str,
+    design_feedback: str,
+    blocks_text: str,
+) -> Dict[str, Any]:
+    return {
+        "prompt": _BLOCK_PROPOSAL_INPUT.render(
+            base_request=base_request,
+            req_text=_recent_requirements(req_history),
+            design_feedback=design_feedback,
+            blocks_text=blocks_text,
+        ),
+        "temperature": 0.3,
+        "instructions": BLOCK_PROPOSAL_INSTRUCTIONS,
+        "max_output_tokens": BLOCK_PROPOSAL_MAX_OUTPUT_TOKENS,
+    }
+
+
+def run_clarification_step(
+    client: OpenAI,
+    technical_checks: str,
+    base_request: str,
+    req_history: str,
+    use_cache: bool = True,
+) -> Tuple[bool, str]:
+    options = clarification_options(
+        technical_checks=technical_checks,
+        base_request=base_request,
+        req_history=req_history,
+    )
+    text = generate_text(client=client, use_cache=use_cache, **options)
+    try:
+        parsed = orjson.loads(text)
+        return bool(parsed.get("complete", False)), str(parsed.get("assistant_message", "")).strip()
+    except orjson.JSONDecodeError:
+        # Only reachable on a refusal: truncation raises OutputTruncatedError, the schema rules out malformed JSON.
+        return False, (
+            "Some technical checks are still unclear. "
+            "Please provide missing details about architecture, integrations, security, data constraints, and non-functional requirements."
+        )
+
+
+def run_functional_design_step(
+    client: OpenAI,
+    base_request: str,
+    req_history: str,
+    use_cache: bool = True,
+) -> Iterator[str]:
+    options = functional_design_options(base_request=base_request, req_history=req_history)
+    return stream_text(client=client, use_cache=use_cache, **options)
+
+
+def run_block_proposal_step(
+    client: OpenAI,
+    base_request: str,
+    req_history: str,
+    design_feedback: str,
+    blocks_text: str,
+    use_cache: bool = True,
+) -> Iterator[str]:
+    options = block_proposal_options(
+        base_request=base_request,
+        req_history=req_history,
+        design_feedback=design_feedback,
+        blocks_text=blocks_text,
+    )
+    return stream_text(client=client, use_cache=use_cache, **options)
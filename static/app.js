@@ -1,5 +1,7 @@
 const stateKey = 'solution_chat_state_v1';
 const messagesKey = 'solution_chat_messages_v1';
+// Only the newest messages are kept in the DOM; older ones render on demand.
+const renderWindow = 40;
 
 const chatContainer = document.getElementById('chatContainer');
 const chatForm = document.getElementById('chatForm');
@@ -18,19 +20,30 @@ const apiKeyInput = document.getElementById('apiKey');
 const technicalChecksInput = document.getElementById('technicalChecks');
 
 let workflowState = JSON.parse(
-  sessionStorage.getItem(stateKey) || '{"phase":"clarification","base_request":"","requirement_messages":[]}'
+  sessionStorage.getItem(stateKey) || '{"phase":"clarification","base_request":"","requirement_text":""}'
 );
 let messages = JSON.parse(sessionStorage.getItem(messagesKey) || '[]');
+// Last successful turn, so an identical resubmission of a proposal request can be answered locally.
+let lastTurn = null;
+let showAllMessages = false;
 
 function saveLocal() {
   sessionStorage.setItem(stateKey, JSON.stringify(workflowState));
   sessionStorage.setItem(messagesKey, JSON.stringify(messages));
 }
 
+// Callers persist with saveLocal() once the turn is complete, not once per bubble.
 function addMessage(role, content) {
-  messages.push({ role, content });
-  saveLocal();
-  renderMessages();
+  const m = { role, content };
+  messages.push(m);
+  // Append only the new bubble; earlier ones are already rendered.
+  chatContainer.appendChild(createMessageElement(m));
+  if (!showAllMessages && messages.length > renderWindow) {
+    chatContainer.querySelector('.msg').remove();
+    chatContainer.querySelector('.show-earlier')?.remove();
+    chatContainer.prepend(createShowEarlierButton());
+  }
+  chatContainer.scrollTop = chatContainer.scrollHeight;
 }
 
 function escapeHtml(str) {
@@ -90,14 +103,37 @@ function markdownToHtml(md) {
   return html;
 }
 
+function createMessageElement(m) {
+  const div = document.createElement('div');
+  div.className = `msg ${m.role}`;
+  div.innerHTML = markdownToHtml(m.content);
+  return div;
+}
+
+function createShowEarlierButton() {
+  const hidden = messages.length - renderWindow;
+  const button = document.createElement('button');
+  button.type = 'button';
+  button.className = 'ghost show-earlier';
+  button.textContent = `Show ${hidden} earlier message${hidden === 1 ? '' : 's'}`;
+  button.addEventListener('click', () => {
+    showAllMessages = true;
+    renderMessages();
+  });
+  return button;
+}
+
+// Full rebuild, used on page load, reset and "show earlier" only.
 function renderMessages() {
-  chatContainer.innerHTML = '';
-  for (const m of messages) {
-    const div = document.createElement('div');
-    div.className = `msg ${m.role}`;
-    div.innerHTML = markdownToHtml(m.content);
-    chatContainer.appendChild(div);
+  const fragment = document.createDocumentFragment();
+  const visible = showAllMessages ? messages : messages.slice(-renderWindow);
+  if (visible.length < messages.length) {
+    fragment.appendChild(createShowEarlierButton());
+  }
+  for (const m of visible) {
+    fragment.appendChild(createMessageElement(m));
   }
+  chatContainer.replaceChildren(fragment);
   chatContainer.scrollTop = chatContainer.scrollHeight;
 }
 
@@ -150,6 +186,50 @@ downloadTemplateBtn.addEventListener('click', () => {
   window.location.href = '/api/blocks/template';
 });
 
+// Reads the NDJSON chat stream: shows deltas as plain text while they arrive, returns the final result.
+async function readChatStream(response) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let liveBubble = null;
+
+  const handleLine = (line) => {
+    if (!line.trim()) return null;
+    const event = JSON.parse(line);
+    if (event.delta === undefined) return event;
+    if (!liveBubble) {
+      thinkingIndicator.classList.add('hidden');
+      liveBubble = document.createElement('div');
+      liveBubble.className = 'msg assistant';
+      chatContainer.appendChild(liveBubble);
+    }
+    liveBubble.textContent += event.delta;
+    chatContainer.scrollTop = chatContainer.scrollHeight;
+    return null;
+  };
+
+  let result = null;
+  try {
+    for (;;) {
+      const { value, done } = await reader.read();
+      buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      for (const line of lines) {
+        result = handleLine(line) || result;
+      }
+      if (done) break;
+    }
+    result = handleLine(buffer) || result;
+  } finally {
+    // The live bubble is not in `messages`, so it must never outlive the stream (even a failed one).
+    if (liveBubble) liveBubble.remove();
+  }
+
+  if (!result) throw new Error('Chat stream ended unexpectedly');
+  return result;
+}
+
 chatForm.addEventListener('submit', async (e) => {
   e.preventDefault();
   const text = chatInput.value.trim();
@@ -158,36 +238,54 @@ chatForm.addEventListener('submit', async (e) => {
   chatInput.value = '';
   addMessage('user', text);
 
+  // Replay only when both turns were sent as proposal requests; the phase after a turn says nothing.
+  const sentPhase = workflowState.phase;
+  if (lastTurn && lastTurn.input === text && lastTurn.phase === 'block_proposal' && sentPhase === 'block_proposal') {
+    for (const msg of lastTurn.replies) {
+      addMessage('assistant', msg);
+    }
+    saveLocal();
+    return;
+  }
+  lastTurn = null;
+
   try {
     thinkingIndicator.classList.remove('hidden');
 
     const r = await fetch('/api/chat', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ user_input: text, state: workflowState }),
+      body: JSON.stringify({ user_input: text, state: workflowState, stream: true }),
     });
-    const data = await r.json();
+    // Validation errors come back as plain JSON before any streaming starts.
+    const data = r.ok ? await readChatStream(r) : await r.json();
 
     thinkingIndicator.classList.add('hidden');
 
-    if (!r.ok) {
+    if (!r.ok || !data.ok) {
       addMessage('assistant', data.error || 'Unknown error');
       return;
     }
 
     workflowState = data.state;
+    // A truncated answer is a retry prompt, never something to replay.
+    lastTurn = data.truncated ? null : { phase: sentPhase, input: text, replies: data.assistant_messages };
     for (const msg of data.assistant_messages) {
       addMessage('assistant', msg);
     }
   } catch (err) {
     thinkingIndicator.classList.add('hidden');
     addMessage('assistant', `Network or server error: ${err}`);
+  } finally {
+    saveLocal();
   }
 });
 
 resetBtn.addEventListener('click', () => {
-  workflowState = { phase: 'clarification', base_request: '', requirement_messages: [] };
+  workflowState = { phase: 'clarification', base_request: '', requirement_text: '' };
   messages = [];
+  lastTurn = null;
+  showAllMessages = false;
   saveLocal();
   renderMessages();
 });